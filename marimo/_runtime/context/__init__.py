@@ -7,6 +7,7 @@ __all__ = [
     "RuntimeContext",
     "runtime_context_installed",
     "teardown_context",
+    "try_get_context",
 ]
 from marimo._runtime.context.types import (
     ContextNotInitializedError,
@@ -16,4 +17,5 @@ from marimo._runtime.context.types import (
     get_global_context,
     runtime_context_installed,
     teardown_context,
+    try_get_context,
 )
@@ -234,6 +234,16 @@ def get_context() -> RuntimeContext:
     return _THREAD_LOCAL_CONTEXT.runtime_context
 
 
+def try_get_context() -> Optional[RuntimeContext]:
+    """Return the runtime context, or None if it has not been created.
+
+    A non-raising variant of get_context, for hot paths where an
+    uninitialized context is common and exception handling would be
+    disproportionately expensive.
+    """
+    return _THREAD_LOCAL_CONTEXT.runtime_context
+
+
 def runtime_context_installed() -> bool:
     try:
         get_context()
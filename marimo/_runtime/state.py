@@ -3,28 +3,19 @@ from __future__ import annotations
 
 import types
 import weakref
-from dataclasses import dataclass
 from typing import Any, Callable, Generic, Optional, TypeVar
-from uuid import uuid4
 
 from marimo._output.rich_help import mddoc
-from marimo._runtime.context import ContextNotInitializedError, get_context
+from marimo._runtime.context import try_get_context
 
 T = TypeVar("T")
-Id = int
-
-
-@dataclass
-class StateItem(Generic[T]):
-    id: Id
-    ref: weakref.ref[State[T]]
 
 
 def extract_name(key: str) -> str:
     # Some variables may use a state internally, as such the lookup needs a
     # context qualifier. We delimit the context and name with a colon, which is
     # not a valid python variable name character.
-    return key.split(":")[-1]
+    return key.rpartition(":")[2]
 
 
 def contextualize_name(key: str, context: Optional[str]) -> str:
@@ -37,11 +28,16 @@ class StateRegistry:
     def __init__(self) -> None:
         # variable name -> state
         # State registry is pruned based on the variable definitions in scope.
-        self._states: dict[str, StateItem[Any]] = {}
-        # id -> variable name for state
-        # NB. python reuses IDs, but an active pruning of the registry should
-        # help protect against this.
-        self._inv_states: dict[Id, set[str]] = {}
+        # Dead states drop out automatically through CPython's weakref
+        # machinery, with no Python-level finalizer callbacks; the inverse
+        # mapping (state -> names) lives on each State instance as
+        # `_bound_names`, which sidesteps id-reuse hazards entirely.
+        self._states: weakref.WeakValueDictionary[str, State[Any]] = (
+            weakref.WeakValueDictionary()
+        )
+        # For naming anonymous registrations; a monotonic counter is much
+        # cheaper than a uuid and just as unique within the registry.
+        self._anon_counter = 0
 
     def register(
         self,
@@ -50,26 +46,17 @@ class StateRegistry:
         context: Optional[str] = None,
     ) -> None:
         if name is None:
-            name = str(uuid4())
+            self._anon_counter += 1
+            name = f"__anon_{self._anon_counter}"
         name = contextualize_name(name, context)
 
-        if id(state) in self._inv_states:
-            ref = next(iter(self._inv_states[id(state)]))
-            # Check for duplicate state ids and clean up accordingly
-            if ref not in self._states or id(self._states[ref].ref()) != id(
-                state
-            ):
-                for ref in self._inv_states[id(state)]:
-                    self._states.pop(ref, None)
-                self._inv_states[id(state)].clear()
-        state_item = StateItem(id(state), weakref.ref(state))
-        self._states[name] = state_item
-        id_to_ref = self._inv_states.get(id(state), set())
-        id_to_ref.add(name)
-        self._inv_states[id(state)] = id_to_ref
-        finalizer = weakref.finalize(state, self._delete, name, state_item)
-        # No need to clean up the registry at program teardown
-        finalizer.atexit = False
+        previous = self._states.get(name)
+        if previous is not None and previous is not state:
+            # The name now refers to a different state; unbind it from the
+            # state that previously held it.
+            previous._bound_names.discard(name)
+        self._states[name] = state
+        state._bound_names.add(name)
 
     def register_scope(
         self, glbls: dict[str, Any], defs: Optional[set[str]] = None
@@ -78,68 +65,63 @@ class StateRegistry:
         already present."""
         if defs is None:
             defs = set(glbls.keys())
+        # Bindings are localized since this runs on every cell execution,
+        # over every definition in scope.
+        state_type = State
+        states = self._states
+        register = self.register
         for variable in defs:
             lookup = glbls.get(variable, None)
-            if isinstance(lookup, State):
-                self.register(lookup, variable)
-
-    def _delete(self, name: str, state_item: StateItem[T]) -> None:
-        return self.delete(name, state_item.ref())
-
-    def delete(
-        self,
-        name: str,
-        state: Optional[State[T]] = None,
-        context: Optional[str] = None,
-    ) -> None:
+            if not isinstance(lookup, state_type):
+                continue
+            if states.get(variable) is lookup:
+                # Already registered under this exact name.
+                continue
+            register(lookup, variable)
+
+    def delete(self, name: str, context: Optional[str] = None) -> None:
         name = contextualize_name(name, context)
         saved_state = self._states.pop(name, None)
-        state_id = id(state)
-        if saved_state and state_id != saved_state.id:
-            self.delete(name, saved_state.ref())
-
-        if state and name in self._inv_states.get(state_id, set()):
-            del self._inv_states[state_id]
+        if saved_state is not None:
+            saved_state._bound_names.discard(name)
 
     def retain_active_states(self, active_variables: set[str]) -> None:
         """Retains only the active states in the registry."""
-        # Remove all non-active states by name
-        active_state_ids = set()
-        for state_key in list(self._states.keys()):
-            if extract_name(state_key) not in active_variables:
-                id_key = id(self._states[state_key])
-                lookup = self._inv_states.get(id_key, None)
-                if lookup is not None:
-                    if state_key in lookup:
-                        lookup.remove(state_key)
-                    if not lookup:
-                        del self._inv_states[id_key]
-                del self._states[state_key]
+        # Single pass over the registry: keep active names, unbind the rest.
+        retained: weakref.WeakValueDictionary[str, State[Any]] = (
+            weakref.WeakValueDictionary()
+        )
+        for state_key, state in self._states.items():
+            if extract_name(state_key) in active_variables:
+                retained[state_key] = state
             else:
-                active_state_ids.add(id(self._states[state_key]))
-
-        # Remove all non-active states by id
-        for state_id in list(self._inv_states.keys()):
-            if state_id not in active_state_ids:
-                del self._inv_states[state_id]
+                state._bound_names.discard(state_key)
+        self._states = retained
 
     def lookup(
         self, name: str, context: Optional[str] = None
-    ) -> Optional[State[T]]:
-        name = contextualize_name(name, context)
-        if name in self._states:
-            return self._states[name].ref()
-        return None
+    ) -> Optional[State[Any]]:
+        return self._states.get(contextualize_name(name, context))
 
     def bound_names(self, state: State[T]) -> set[str]:
-        if id(state) in self._inv_states:
-            return self._inv_states[id(state)]
-        return set()
+        return state._bound_names
 
 
 class State(Generic[T]):
     """Mutable reactive state"""
 
+    # Getters run on every reactive recomputation; slots make those
+    # attribute loads a fixed offset instead of a dict probe. Subclasses
+    # that don't declare __slots__ still get a __dict__ for their own
+    # attributes.
+    __slots__ = (
+        "_value",
+        "allow_self_loops",
+        "_set_value_obj",
+        "_bound_names",
+        "__weakref__",
+    )
+
     def __init__(
         self,
         value: T,
@@ -150,38 +132,89 @@ class State(Generic[T]):
     ) -> None:
         self._value = value
         self.allow_self_loops = allow_self_loops
-        self._set_value = SetFunctor(self)
-
-        try:
-            if _registry is None:
-                _registry = get_context().state_registry
-            _registry.register(self, _name, _context)
-        except ContextNotInitializedError:
-            # Registration may be picked up later, but there is nothing to do
-            # at this point.
-            pass
+        # The setter is created lazily; many internal states never have
+        # theirs invoked.
+        self._set_value_obj: Optional[SetFunctor[T]] = None
+        # Names this state is registered under in a registry.
+        self._bound_names: set[str] = set()
+
+        if _registry is None:
+            ctx = try_get_context()
+            if ctx is None:
+                # Registration may be picked up later, but there is nothing
+                # to do at this point.
+                return
+            _registry = ctx.state_registry
+        _registry.register(self, _name, _context)
 
     def __call__(self) -> T:
         return self._value
 
+    @property
+    def _set_value(self) -> SetFunctor[T]:
+        functor = self._set_value_obj
+        if functor is None:
+            functor = self._set_value_obj = SetFunctor(self)
+        return functor
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Registry bindings are process-local; a pickled copy (e.g. from
+        # persistent caching) starts out unregistered.
+        attrs: dict[str, Any] = {
+            "_value": self._value,
+            "allow_self_loops": self.allow_self_loops,
+            "_set_value_obj": self._set_value_obj,
+        }
+        # Subclass attributes live in an ordinary __dict__.
+        attrs.update(getattr(self, "__dict__", {}))
+        return attrs
+
+    def __setstate__(self, attrs: dict[str, Any]) -> None:
+        self._bound_names = set()
+        self._set_value_obj = None
+        # Pickles written before the setter became lazy store it eagerly
+        # under _set_value, which is now a read-only property.
+        legacy_setter = attrs.pop("_set_value", None)
+        if legacy_setter is not None:
+            self._set_value_obj = legacy_setter
+        for key, value in attrs.items():
+            setattr(self, key, value)
+
 
 class SetFunctor(Generic[T]):
     """Typed function tied to a state instance"""
 
+    __slots__ = ("_state",)
+
     def __init__(self, state: State[T]):
         self._state = state
 
+    def __setstate__(self, state: dict[str, Any] | tuple[Any, Any]) -> None:
+        # Pickles written before SetFunctor was slotted (e.g. in persistent
+        # caches) carry a plain attribute dict; slotted pickles carry a
+        # (dict, slots) pair.
+        if isinstance(state, tuple):
+            for part in state:
+                if part:
+                    for key, value in part.items():
+                        setattr(self, key, value)
+        else:
+            for key, value in state.items():
+                setattr(self, key, value)
+
     def __call__(self, update: T | Callable[[T], T]) -> None:
-        self._state._value = (
-            update(self._state._value)  # type: ignore[assignment]
-            if isinstance(update, (types.MethodType, types.FunctionType))
-            else update  # type: ignore[assignment]
-        )
-        try:
-            ctx = get_context()
-        except ContextNotInitializedError:
-            return
-        ctx.register_state_update(self._state)
+        # Exact type checks: functions and bound methods can't be subclassed,
+        # and a broader callable() test would wrongly invoke callable objects
+        # stored as plain values.
+        update_type = type(update)
+        if update_type is types.FunctionType or (
+            update_type is types.MethodType
+        ):
+            update = update(self._state._value)  # type: ignore[operator]
+        self._state._value = update  # type: ignore[assignment]
+        ctx = try_get_context()
+        if ctx is not None:
+            ctx.register_state_update(self._state)
 
 
 @mddoc
@@ -1,5 +1,11 @@
 # Copyright 2024 Marimo. All rights reserved.
+import copyreg
+import io
+import pickle
+from typing import Any
+
 from marimo._runtime.runtime import Kernel
+from marimo._runtime.state import SetFunctor, State
 from tests.conftest import ExecReqProvider
 
 
@@ -218,3 +224,79 @@ async def test_set_state_not_strict_copied(
 
     assert id(k.globals["a"]) == id(k.globals["state"])
     assert id(k.globals["b"]) == id(k.globals["set_state"])
+
+
+class _StateWithDict(State[int]):
+    """State subclass with ordinary __dict__-backed attributes."""
+
+    def __init__(self, value: int, tag: str) -> None:
+        super().__init__(value)
+        self.tag = tag
+
+
+class _LegacyStatePickler(pickle.Pickler):
+    """Emulates pickles written before State and SetFunctor were slotted.
+
+    Those pickles carry plain attribute dicts, with the setter stored
+    eagerly under _set_value; persistent caches written by earlier
+    releases must keep loading.
+    """
+
+    def reducer_override(self, obj: Any) -> Any:
+        if type(obj) is SetFunctor:
+            return (
+                copyreg._reconstructor,
+                (SetFunctor, object, None),
+                {"_state": obj._state},
+            )
+        if type(obj) is State:
+            return (
+                copyreg._reconstructor,
+                (State, object, None),
+                {
+                    "_value": obj._value,
+                    "allow_self_loops": obj.allow_self_loops,
+                    "_set_value": SetFunctor(obj),
+                },
+            )
+        return NotImplemented
+
+
+def test_state_pickle_round_trip() -> None:
+    state_instance = State(0)
+    # Materialize the setter so it is part of the pickle
+    _ = state_instance._set_value
+
+    clone = pickle.loads(pickle.dumps(state_instance))
+
+    assert clone() == 0
+    assert clone.allow_self_loops is False
+    # Registry bindings are process-local and not carried over
+    assert clone._bound_names == set()
+    clone._set_value(1)
+    assert clone() == 1
+
+
+def test_state_subclass_pickle_round_trip() -> None:
+    clone = pickle.loads(pickle.dumps(_StateWithDict(2, tag="cached")))
+
+    assert clone() == 2
+    assert clone.tag == "cached"
+    clone._set_value(3)
+    assert clone() == 3
+
+
+def test_unpickle_legacy_state_format() -> None:
+    buffer = io.BytesIO()
+    _LegacyStatePickler(buffer).dump(State(3))
+
+    clone = pickle.loads(buffer.getvalue())
+
+    assert clone() == 3
+    assert clone._bound_names == set()
+    # The eagerly stored legacy setter is adopted as the cached setter and
+    # still targets the unpickled state
+    assert clone._set_value_obj is not None
+    assert clone._set_value_obj._state is clone
+    clone._set_value(4)
+    assert clone() == 4